@@ -1,17 +1,85 @@
-from typing import Any, Dict, Optional, Tuple, List
-from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, List, Union
+from contextlib import asynccontextmanager
+from email.utils import formatdate
+import asyncio
 import random
 import re
-
-import requests
-from bs4 import BeautifulSoup
-from fastapi import FastAPI, HTTPException
-
-
-app = FastAPI(title="Yandex Weather API")
-
-CACHE_TTL = timedelta(minutes=15)
-_cache: Dict[Tuple[str, float, float], Dict[str, Any]] = {}
+import time
+
+import ahocorasick
+import httpx
+import xxhash
+from cachetools import LRUCache, TTLCache
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from lxml import etree, html as lhtml
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    app.state.client = httpx.AsyncClient(
+        # Connection failures are retried twice by the transport (with backoff).
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        ),
+        timeout=10.0,
+        follow_redirects=True,
+    )
+    _warm()
+    try:
+        yield
+    finally:
+        await app.state.client.aclose()
+
+
+app = FastAPI(title="Yandex Weather API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+CACHE_TTL = 15 * 60  # seconds
+# Expired entries are kept a while longer for revalidation and as an error fallback.
+CACHE_RETENTION = 4 * CACHE_TTL
+CACHE_MAXSIZE = 4096
+# Decimal places kept from request coordinates; 3 is roughly a 100 m grid.
+COORD_PRECISION = 3
+_cache: TTLCache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_RETENTION)
+# Parsed results keyed by a hash of the page body; identical pages skip the parser.
+_parse_cache: LRUCache = LRUCache(maxsize=256)
+_inflight: Dict[Tuple[str, float, float], "asyncio.Task[Any]"] = {}
+_RE_TEMP = re.compile(r'[+-]?\d+°')
+_RE_DIGITS = re.compile(r'\d+')
+
+# Common Yandex weather conditions in priority order; more specific phrases come
+# before the shorter keywords they contain so they win when both match.
+_COND_MAP: Dict[str, str] = {
+    "ясно": "clear",
+    "облачно с прояснениями": "cloudy-and-clear",
+    "малооблачно": "partly-cloudy",
+    "переменная облачность": "partly-cloudy",
+    "облачно": "cloudy",
+    "пасмурно": "overcast",
+    "небольшой дождь": "light-rain",
+    "слабый дождь": "light-rain",
+    "сильный дождь": "heavy-rain",
+    "ливень": "heavy-rain",
+    "дождь": "rain",
+    "гроза": "thunderstorm",
+    "небольшой снег": "light-snow",
+    "слабый снег": "light-snow",
+    "сильный снег": "heavy-snow",
+    "метель": "heavy-snow",
+    "снег": "snow",
+    "туман": "fog",
+    "мгла": "haze",
+    "дымка": "haze",
+    "морось": "drizzle",
+    "град": "hail",
+}
+_COND_AUTOMATON = ahocorasick.Automaton()
+for _priority, (_keyword, _code) in enumerate(_COND_MAP.items()):
+    _COND_AUTOMATON.add_word(_keyword, (_priority, _code))
+_COND_AUTOMATON.make_automaton()
 _UA_POOL = [
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
@@ -26,29 +94,45 @@ def make_headers() -> Dict[str, str]:
     return {
         "User-Agent": random.choice(_UA_POOL),
         "Accept-Language": "ru-RU,ru;q=0.9",
+        "Accept-Encoding": "gzip, deflate",
     }
 
 
-def _get_cached(scope: str, lat: float, lon: float) -> Optional[Dict[str, Any]]:
-    key = (scope, lat, lon)
-    entry = _cache.get(key)
-    if not entry:
-        return None
-    if datetime.now(timezone.utc) - entry["ts"] > CACHE_TTL:
-        return None
-    return entry["data"]
+def _qkey(lat: float, lon: float, precision: int = COORD_PRECISION) -> Tuple[float, float]:
+    """Snap coordinates to a grid so nearby requests share cache entries and upstream URLs."""
+    return (round(lat, precision), round(lon, precision))
 
 
-def _set_cached(scope: str, lat: float, lon: float, data: Dict[str, Any]) -> None:
-    key = (scope, lat, lon)
-    _cache[key] = {"ts": datetime.now(timezone.utc), "data": data}
+def _get_cached(scope: str, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    """Return the cache entry (data, upstream validators and fetch times), fresh or not."""
+    return _cache.get((scope, lat, lon))
+
+
+def _set_cached(
+    scope: str,
+    lat: float,
+    lon: float,
+    data: Any,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    body_hash: Optional[int] = None,
+) -> None:
+    _cache[(scope, lat, lon)] = {
+        "data": data,
+        "etag": etag,
+        "last_modified": last_modified,
+        "body_hash": body_hash,
+        # Monotonic, for age checks; fetched_at is wall-clock time for HTTP headers only.
+        "ts": time.monotonic(),
+        "fetched_at": time.time(),
+    }
 
 
 def _extract_temperature(text: Optional[str]) -> Optional[str]:
     """Extract temperature value from text like 'Ощущается как +3°' -> '+3°'"""
     if not text:
         return None
-    match = re.search(r'[+-]?\d+°', text)
+    match = _RE_TEMP.search(text)
     return match.group(0) if match else None
 
 
@@ -63,7 +147,7 @@ def _extract_pressure(text: Optional[str]) -> Optional[str]:
     """Extract pressure value from text like '758 мм рт. ст.' -> '758'"""
     if not text:
         return None
-    match = re.search(r'\d+', text)
+    match = _RE_DIGITS.search(text)
     return match.group(0) if match else None
 
 
@@ -71,7 +155,7 @@ def _extract_humidity(text: Optional[str]) -> Optional[str]:
     """Extract humidity value from text like '65%' -> '65'"""
     if not text:
         return None
-    match = re.search(r'\d+', text)
+    match = _RE_DIGITS.search(text)
     return match.group(0) if match else None
 
 
@@ -80,96 +164,69 @@ def _map_condition_to_code(condition_text: Optional[str]) -> Optional[str]:
     if not condition_text:
         return None
     
-    text = condition_text.lower()
-    
-    # Mapping based on common Yandex weather conditions
-    if "ясно" in text:
-        return "clear"
-    elif "малооблачно" in text or "переменная облачность" in text:
-        return "partly-cloudy"
-    elif "облачно с прояснениями" in text:
-        return "cloudy-and-clear"
-    elif "облачно" in text:
-        return "cloudy"
-    elif "пасмурно" in text:
-        return "overcast"
-    elif "небольшой дождь" in text or "слабый дождь" in text:
-        return "light-rain"
-    elif "дождь" in text:
-        return "rain"
-    elif "ливень" in text or "сильный дождь" in text:
-        return "heavy-rain"
-    elif "гроза" in text:
-        return "thunderstorm"
-    elif "небольшой снег" in text or "слабый снег" in text:
-        return "light-snow"
-    elif "снег" in text:
-        return "snow"
-    elif "метель" in text or "сильный снег" in text:
-        return "heavy-snow"
-    elif "туман" in text:
-        return "fog"
-    elif "мгла" in text or "дымка" in text:
-        return "haze"
-    elif "морось" in text:
-        return "drizzle"
-    elif "град" in text:
-        return "hail"
-    else:
-        return "unknown"
+    best = min((value for _, value in _COND_AUTOMATON.iter(condition_text.lower())), default=None)
+    return best[1] if best else "unknown"
+
+
+def _joined_text(node: LexborNode, separator: str = " ") -> str:
+    """Stripped text of every non-blank text node under ``node``, joined by ``separator``."""
+    parts = (
+        child.text_content.strip()
+        for child in node.traverse(include_text=True)
+        if child.tag == "-text"
+    )
+    return separator.join(part for part in parts if part)
+
+
+def _full_text(node: Optional[LexborNode]) -> Optional[str]:
+    """Whole text of ``node`` with only the ends stripped, like BeautifulSoup's ``.text.strip()``."""
+    return node.text().strip() if node else None
+
 
+def _find_parent(node: LexborNode, tag: str) -> Optional[LexborNode]:
+    parent = node.parent
+    while parent is not None and parent.tag != tag:
+        parent = parent.parent
+    return parent
 
-def parse_weather(html: str) -> Dict[str, Optional[str]]:
+
+def parse_weather(html: Union[bytes, str]) -> Dict[str, Optional[str]]:
     """
     Parse the Yandex weather HTML fragment and return the main metrics.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    wrap = soup.select_one("div.AppFact_wrap__N4SYB")
+    tree = LexborHTMLParser(html)
+    wrap = tree.css_first("div.AppFact_wrap__N4SYB")
     if not wrap:
-        wrap = soup.find("div", class_=lambda c: isinstance(c, str) and "AppFact_wrap__" in c)
+        wrap = tree.css_first("div[class*='AppFact_wrap__']")
     if not wrap:
-        value_span = soup.find("span", class_=lambda c: isinstance(c, str) and "AppFactTemperature_value" in c)
-        wrap = value_span.find_parent("div") if value_span else None
+        value_span = tree.css_first("span[class*='AppFactTemperature_value']")
+        wrap = _find_parent(value_span, "div") if value_span else None
     if not wrap:
         raise ValueError("Weather block not found in the page")
 
-    temperature_block = wrap.select_one("p.AppFactTemperature_content__Lx4p9")
-    sign = temperature_block.select_one("span.AppFactTemperature_sign__1MeN4") if temperature_block else None
-    value = temperature_block.select_one("span.AppFactTemperature_value__2qhsG") if temperature_block else None
-    degree = temperature_block.select_one("span.AppFactTemperature_degree__LL_2v") if temperature_block else None
-    temperature = "".join(
-        filter(
-            None,
-            [
-                sign.text if sign else "",
-                value.text if value else "",
-                degree.text if degree else "",
-            ],
-        )
-    ).strip() or None
-
-    condition_warning = wrap.select_one("p.AppFact_warning__8kUUn")
-    feels_like = wrap.select_one("span.AppFact_feels__IJoel")
-    yesterday_full = wrap.select_one("span.AppFact_yesterday__zTK7e")
-    yesterday_short = wrap.select_one("span.AppFact_yesterdayShort__DB943")
+    temperature_block = wrap.css_first("p.AppFactTemperature_content__Lx4p9")
+    temperature_parts = [
+        temperature_block.css_first("span.AppFactTemperature_sign__1MeN4"),
+        temperature_block.css_first("span.AppFactTemperature_value__2qhsG"),
+        temperature_block.css_first("span.AppFactTemperature_degree__LL_2v"),
+    ] if temperature_block else []
+    temperature = "".join(part.text() for part in temperature_parts if part).strip() or None
 
-    details_items = wrap.select("ul.AppFact_details__OYahy li.AppFact_details__item__QFIXI")
+    details_items = wrap.css("ul.AppFact_details__OYahy li.AppFact_details__item__QFIXI")
 
     def detail_at(index: int) -> Optional[str]:
-        try:
-            return details_items[index].get_text(strip=True)
-        except (IndexError, AttributeError):
-            return None
+        # Text nodes join with "", as get_text(strip=True) does.
+        return _joined_text(details_items[index], "") if index < len(details_items) else None
+
+    condition_text = _full_text(wrap.css_first("p.AppFact_warning__8kUUn"))
 
-    condition_text = condition_warning.text.strip() if condition_warning else None
-    
     return {
         "temperature": temperature,
         "condition": _map_condition_to_code(condition_text),
         "condition_text": condition_text,
-        "feels_like": _extract_temperature(feels_like.text.strip() if feels_like else None),
-        "yesterday_full": _extract_temperature(yesterday_full.text.strip() if yesterday_full else None),
-        "yesterday_short": _extract_temperature(yesterday_short.text.strip() if yesterday_short else None),
+        "feels_like": _extract_temperature(_full_text(wrap.css_first("span.AppFact_feels__IJoel"))),
+        "yesterday_full": _extract_temperature(_full_text(wrap.css_first("span.AppFact_yesterday__zTK7e"))),
+        "yesterday_short": _extract_temperature(_full_text(wrap.css_first("span.AppFact_yesterdayShort__DB943"))),
         "wind": _extract_wind(detail_at(0)),
         "pressure": _extract_pressure(detail_at(1)),
         "humidity": _extract_humidity(detail_at(2)),
@@ -177,44 +234,75 @@ def parse_weather(html: str) -> Dict[str, Optional[str]]:
     }
 
 
-def parse_month(html: str) -> List[Dict[str, Optional[str]]]:
+def _xp_class(name: str) -> str:
+    """XPath predicate matching elements that carry the exact CSS class ``name``."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_LXML_UTF8 = lhtml.HTMLParser(encoding="utf-8")
+_XP_MONTH = etree.XPath(f"(//article[{_xp_class('AppMonth_month__CunyE')}])[1]")
+_XP_MONTH_DAYS = etree.XPath(
+    f".//div[{_xp_class('AppMonthCalendarDay_day__GjOhu')}]"
+    "[not(ancestor::li[1][contains(@class, 'climateStart')])]"
+)
+_XP_DAY_LI = etree.XPath("ancestor::li[1]")
+_XP_DAY_LINK = etree.XPath(f"(.//a[{_xp_class('AppMonthCalendarDay_day__date__QDruE')}])[1]")
+_DAY_TEMP_PATH = (
+    f".//p[{_xp_class('AppMonthCalendarDay_temperature__4x_Yx')}]"
+    f"//span[{_xp_class('AppMonthCalendarDay_temperature__number__VSntF')}]"
+)
+_XP_DAY_TEMP_FIRST = etree.XPath(f"({_DAY_TEMP_PATH})[1]")
+_XP_DAY_TEMP_NIGHT = etree.XPath(
+    f"({_DAY_TEMP_PATH}[{_xp_class('AppMonthCalendarDay_temperature__number_night__ggkzj')}])[1]"
+)
+_XP_DAY_DETAILS = etree.XPath(f"(.//div[{_xp_class('AppMonthCalendarDayDetailedInfo_details__Z6kgi')}])[1]")
+_XP_DAY_FEELS = etree.XPath(f"(.//p[{_xp_class('AppMonthCalendarDayDetailedInfo_details__feelsLike__nXzvQ')}])[1]")
+_XP_DAY_PARAMS = etree.XPath(f".//ul[{_xp_class('AppMonthCalendarDayDetailedInfo_params__7Z8Yt')}]//li")
+
+
+def _first(elements: List[Any]) -> Optional[Any]:
+    return elements[0] if elements else None
+
+
+def _element_joined_text(element: Any, separator: str = " ") -> str:
+    """lxml counterpart of ``_joined_text``."""
+    return separator.join(part.strip() for part in element.itertext() if part.strip())
+
+
+def _element_full_text(element: Optional[Any]) -> Optional[str]:
+    """lxml counterpart of ``_full_text``."""
+    return "".join(element.itertext()).strip() if element is not None else None
+
+
+def parse_month(html: Union[bytes, str]) -> List[Dict[str, Optional[str]]]:
     """
     Parse the Yandex month view and return a list of day forecasts.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    article = soup.select_one("article.AppMonth_month__CunyE")
-    if not article:
+    try:
+        root = lhtml.document_fromstring(html, parser=_LXML_UTF8 if isinstance(html, bytes) else None)
+    except etree.ParserError as exc:
+        raise ValueError(f"Month page could not be parsed: {exc}") from exc
+    article = _first(_XP_MONTH(root))
+    if article is None:
         raise ValueError("Month block not found in the page")
 
     days: List[Dict[str, Optional[str]]] = []
 
-    for day_block in article.select("div.AppMonthCalendarDay_day__GjOhu"):
-        li = day_block.find_parent("li")
-        classes = li.get("class", []) if li else []
-        if any("climateStart" in cls for cls in classes):
-            continue
+    for day_block in _XP_MONTH_DAYS(article):
+        li = _first(_XP_DAY_LI(day_block))
+        link = _first(_XP_DAY_LINK(day_block))
+        title = link.get("aria-label") if link is not None else None
+        date_text = _element_joined_text(link) if link is not None else None
 
-        link = day_block.select_one("a.AppMonthCalendarDay_day__date__QDruE")
-        title = link.get("aria-label") if link else None
-        date_text = link.get_text(" ", strip=True) if link else None
+        day_temp = _element_full_text(_first(_XP_DAY_TEMP_FIRST(day_block)))
+        night_temp = _element_full_text(_first(_XP_DAY_TEMP_NIGHT(day_block)))
 
-        temp_spans = day_block.select("p.AppMonthCalendarDay_temperature__4x_Yx span.AppMonthCalendarDay_temperature__number__VSntF")
-        day_temp = temp_spans[0].text.strip() if len(temp_spans) > 0 else None
-        night_temp = None
-        for span in temp_spans:
-            if "AppMonthCalendarDay_temperature__number_night__ggkzj" in span.get("class", []):
-                night_temp = span.text.strip()
-                break
-
-        details = (li or day_block).select_one("div.AppMonthCalendarDayDetailedInfo_details__Z6kgi")
-        feels = details.select_one("p.AppMonthCalendarDayDetailedInfo_details__feelsLike__nXzvQ") if details else None
-        params = details.select("ul.AppMonthCalendarDayDetailedInfo_params__7Z8Yt li") if details else []
+        details = _first(_XP_DAY_DETAILS(li if li is not None else day_block))
+        feels = _first(_XP_DAY_FEELS(details)) if details is not None else None
+        params = _XP_DAY_PARAMS(details) if details is not None else []
 
         def param_at(index: int) -> Optional[str]:
-            try:
-                return params[index].get_text(" ", strip=True)
-            except (IndexError, AttributeError):
-                return None
+            return _element_joined_text(params[index]) if index < len(params) else None
 
         days.append(
             {
@@ -222,7 +310,7 @@ def parse_month(html: str) -> List[Dict[str, Optional[str]]]:
                 "label": date_text,
                 "day_temp": day_temp,
                 "night_temp": night_temp,
-                "feels_like": _extract_temperature(feels.text.strip() if feels else None),
+                "feels_like": _extract_temperature(_element_full_text(feels)),
                 "pressure": _extract_pressure(param_at(0)),
                 "humidity": _extract_humidity(param_at(1)),
                 "wind": _extract_wind(param_at(2)),
@@ -236,67 +324,174 @@ def parse_month(html: str) -> List[Dict[str, Optional[str]]]:
     return days
 
 
-@app.get("/api/weather/total")
-def get_weather_total(lat: float, lon: float):
+_SOURCES = {
+    "current": ("https://yandex.ru/pogoda/ru", parse_weather),
+    "month": ("https://yandex.ru/pogoda/ru/month", parse_month),
+}
+
+
+def _source_url(scope: str, lat: float, lon: float) -> str:
+    base, _ = _SOURCES[scope]
+    return f"{base}?lat={lat}&lon={lon}"
+
+
+async def _parse(scope: str, content: bytes, body_hash: int) -> Any:
+    key = (scope, body_hash)
+    data = _parse_cache.get(key)
+    if data is None:
+        _, parser = _SOURCES[scope]
+        # Parsing is CPU-bound; run it in a worker thread so the event loop keeps serving.
+        data = await asyncio.to_thread(parser, content)
+        _parse_cache[key] = data
+    return data
+
+
+async def _fetch(scope: str, lat: float, lon: float, entry: Optional[Dict[str, Any]] = None) -> Any:
     """
-    Fetch and parse weather data from Yandex for the given coordinates.
+    Fetch and parse the Yandex page for the scope and store the result in the cache.
+    When a previous cache entry is given the request is conditional and a 304 reuses its data.
     """
-    url = f"https://yandex.ru/pogoda/ru?lat={lat}&lon={lon}"
-    scope = "current"
-    cached = _get_cached(scope, lat, lon)
-    if cached:
-        return {"lat": lat, "lon": lon, "source": url, "data": cached, "cached": True}
-    try:
-        response = requests.get(url, timeout=10, headers=make_headers())
+    headers = make_headers()
+    if entry:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        headers["If-Modified-Since"] = entry["last_modified"] or formatdate(entry["fetched_at"], usegmt=True)
+    response = await app.state.client.get(_source_url(scope, lat, lon), headers=headers)
+    if entry and response.status_code == 304:
+        data = entry["data"]
+        etag = response.headers.get("ETag", entry["etag"])
+        last_modified = response.headers.get("Last-Modified", entry["last_modified"])
+        body_hash = entry["body_hash"]
+    else:
         response.raise_for_status()
-    except requests.RequestException as exc:
-        cached = _get_cached(scope, lat, lon)
-        if cached:
-            return {"lat": lat, "lon": lon, "source": url, "data": cached, "cached": True}
-        raise HTTPException(status_code=502, detail=f"Failed to fetch source page: {exc}") from exc
+        body_hash = xxhash.xxh3_64_intdigest(response.content)
+        if entry and entry["body_hash"] == body_hash:
+            # Upstream ignored the validators but sent the same page.
+            data = entry["data"]
+        else:
+            data = await _parse(scope, response.content, body_hash)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+    _set_cached(scope, lat, lon, data, etag, last_modified, body_hash)
+    return data
+
+
+async def _fetch_shared(scope: str, lat: float, lon: float, entry: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Single-flight wrapper around ``_fetch``: concurrent callers for the same key await one upstream request.
+    """
+    key = (scope, lat, lon)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch(scope, lat, lon, entry))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so a disconnecting client does not cancel the fetch other callers wait on.
+    return await asyncio.shield(task)
+
+
+async def _refresh(scope: str, lat: float, lon: float) -> None:
+    """
+    Background revalidation of a cache entry that is still served to clients.
+    """
+    entry = _get_cached(scope, lat, lon)
+    if entry and time.monotonic() - entry["ts"] < CACHE_TTL / 2:
+        # Another refresh finished after this one was scheduled.
+        return
+    try:
+        await _fetch_shared(scope, lat, lon, entry)
+    except (httpx.HTTPError, ValueError):
+        # Keep serving the current entry; the next request past the TTL retries.
+        pass
+
+
+async def _serve(
+    scope: str, lat: float, lon: float, precision: int, background_tasks: BackgroundTasks
+) -> Dict[str, Any]:
+    qlat, qlon = _qkey(lat, lon, precision)
+    url = _source_url(scope, qlat, qlon)
+    entry = _get_cached(scope, qlat, qlon)
+    if entry:
+        data = entry["data"]
+        age = time.monotonic() - entry["ts"]
+        if age < CACHE_TTL:
+            if age >= CACHE_TTL / 2:
+                background_tasks.add_task(_refresh, scope, qlat, qlon)
+            return {"lat": lat, "lon": lon, "source": url, "data": data, "cached": True}
 
     try:
-        data = parse_weather(response.text)
+        data = await _fetch_shared(scope, qlat, qlon, entry)
+    except httpx.HTTPError as exc:
+        if entry:
+            return {"lat": lat, "lon": lon, "source": url, "data": entry["data"], "cached": True}
+        raise HTTPException(status_code=502, detail=f"Failed to fetch source page: {exc}") from exc
     except ValueError as exc:
-        cached = _get_cached(scope, lat, lon)
-        if cached:
-            return {"lat": lat, "lon": lon, "source": url, "data": cached, "cached": True}
+        if entry:
+            return {"lat": lat, "lon": lon, "source": url, "data": entry["data"], "cached": True}
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
-    _set_cached(scope, lat, lon, data)
     return {"lat": lat, "lon": lon, "source": url, "data": data, "cached": False}
 
 
-@app.get("/api/weather/month")
-def get_weather_month(lat: float, lon: float):
+# Minimal pages in the Yandex markup, parsed once at startup so the first real
+# request does not pay for first-use initialisation inside lexbor and libxml2.
+_WARM_CURRENT_HTML = (
+    '<div class="AppFact_wrap__N4SYB">'
+    '<p class="AppFactTemperature_content__Lx4p9">'
+    '<span class="AppFactTemperature_value__2qhsG">0</span></p>'
+    '<p class="AppFact_warning__8kUUn">Ясно</p>'
+    '<span class="AppFact_feels__IJoel">+0°</span>'
+    '<ul class="AppFact_details__OYahy"><li class="AppFact_details__item__QFIXI">0%</li></ul>'
+    "</div>"
+).encode()
+_WARM_MONTH_HTML = (
+    '<article class="AppMonth_month__CunyE"><ul><li>'
+    '<div class="AppMonthCalendarDay_day__GjOhu">'
+    '<a class="AppMonthCalendarDay_day__date__QDruE" aria-label="1">1</a></div>'
+    '<div class="AppMonthCalendarDayDetailedInfo_details__Z6kgi">'
+    '<ul class="AppMonthCalendarDayDetailedInfo_params__7Z8Yt"><li>0</li></ul></div>'
+    "</li></ul></article>"
+).encode()
+
+
+def _warm() -> None:
+    parse_weather(_WARM_CURRENT_HTML)
+    parse_month(_WARM_MONTH_HTML)
+
+
+@app.get("/api/warm")
+def warm():
     """
-    Fetch and parse month weather data from Yandex for the given coordinates.
+    Run both parsers on built-in sample pages; usable as a readiness probe.
     """
-    scope = "month"
-    url = f"https://yandex.ru/pogoda/ru/month?lat={lat}&lon={lon}"
-    cached = _get_cached(scope, lat, lon)
-    if cached:
-        return {"lat": lat, "lon": lon, "source": url, "data": cached, "cached": True}
+    _warm()
+    return {"status": "ok"}
 
-    try:
-        response = requests.get(url, timeout=10, headers=make_headers())
-        response.raise_for_status()
-    except requests.RequestException as exc:
-        cached = _get_cached(scope, lat, lon)
-        if cached:
-            return {"lat": lat, "lon": lon, "source": url, "data": cached, "cached": True}
-        raise HTTPException(status_code=502, detail=f"Failed to fetch source page: {exc}") from exc
 
-    try:
-        data = parse_month(response.text)
-    except ValueError as exc:
-        cached = _get_cached(scope, lat, lon)
-        if cached:
-            return {"lat": lat, "lon": lon, "source": url, "data": cached, "cached": True}
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+@app.get("/api/weather/total")
+async def get_weather_total(
+    lat: float,
+    lon: float,
+    background_tasks: BackgroundTasks,
+    precision: int = Query(COORD_PRECISION, ge=0, le=8),
+):
+    """
+    Fetch and parse weather data from Yandex for the given coordinates.
+    """
+    return await _serve("current", lat, lon, precision, background_tasks)
 
-    _set_cached(scope, lat, lon, data)
-    return {"lat": lat, "lon": lon, "source": url, "data": data, "cached": False}
+
+@app.get("/api/weather/month")
+async def get_weather_month(
+    lat: float,
+    lon: float,
+    background_tasks: BackgroundTasks,
+    precision: int = Query(COORD_PRECISION, ge=0, le=8),
+):
+    """
+    Fetch and parse month weather data from Yandex for the given coordinates.
+    """
+    return await _serve("month", lat, lon, precision, background_tasks)
 
 
 if __name__ == "__main__":